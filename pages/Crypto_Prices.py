@@ -3,7 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
+import requests_cache
+import orjson
+import httpx
+import asyncio
+import copy
+import time
 from datetime import datetime
 
 st.set_page_config(page_title="Crypto Prices (CoinMarketCap-style)", layout="wide")
@@ -21,19 +26,38 @@ MAJORS = [
 
 GECKO_BASE = "https://api.coingecko.com/api/v3"
 
+# Charts longer than MAX_PLOT_POINTS are downsampled to LTTB_POINTS before plotting
+MAX_PLOT_POINTS = 800
+LTTB_POINTS = 500
+
 # -----------------------------
 # Data helpers (cached)
 # -----------------------------
-@st.cache_data(ttl=300)
-def get_markets_for_cards(ids: list[str]) -> pd.DataFrame:
+@st.cache_resource
+def get_http_session() -> requests_cache.CachedSession:
+    """Keep-alive session whose responses persist on disk across restarts."""
+    return requests_cache.CachedSession(".cache/http", backend="sqlite", expire_after=300, allowable_codes=(200,))
+
+SESSION = get_http_session()
+
+def _fetch_markets(ids: list[str], sparkline: bool) -> pd.DataFrame:
     params = {
         "vs_currency": "usd",
         "ids": ",".join(ids),
-        "sparkline": "true",
+        "sparkline": "true" if sparkline else "false",
         "price_change_percentage": "24h",
     }
-    r = requests.get(f"{GECKO_BASE}/coins/markets", params=params, timeout=20)
-    df = pd.DataFrame(r.json())
+    r = SESSION.get(f"{GECKO_BASE}/coins/markets", params=params, timeout=20)
+    return pd.DataFrame(orjson.loads(r.content))
+
+@st.cache_data(ttl=300)
+def get_markets_basic(ids: list[str]) -> pd.DataFrame:
+    df = _fetch_markets(ids, sparkline=False)
+    return df[["id", "symbol", "name", "current_price", "price_change_percentage_24h"]]
+
+@st.cache_data(ttl=300)
+def get_markets_sparkline(ids: list[str]) -> pd.DataFrame:
+    df = _fetch_markets(ids, sparkline=True)
     # Normalize sparkline to list of numbers
     if "sparkline_in_7d" in df.columns:
         df["sparkline"] = df["sparkline_in_7d"].apply(lambda x: x.get("price", []) if isinstance(x, dict) else [])
@@ -41,33 +65,60 @@ def get_markets_for_cards(ids: list[str]) -> pd.DataFrame:
         df["sparkline"] = [[] for _ in range(len(df))]
     return df[["id", "symbol", "name", "current_price", "price_change_percentage_24h", "sparkline"]]
 
-@st.cache_data(ttl=300)
-def get_market_chart(coin_id: str, days: int) -> pd.DataFrame:
+def downsample_lttb(df: pd.DataFrame, y_col: str, n_out: int = LTTB_POINTS) -> pd.DataFrame:
+    """Downsample a time-ordered frame to n_out rows with LTTB when it exceeds MAX_PLOT_POINTS."""
+    if len(df) <= MAX_PLOT_POINTS:
+        return df
+    df = df.dropna(subset=[y_col])
+    n = len(df)
+    if n <= n_out:
+        return df
+    # Largest-Triangle-Three-Buckets over row positions (CoinGecko samples are evenly spaced).
+    # First and last rows are kept; each of the n_out - 2 buckets in between keeps the row forming
+    # the largest triangle with the previously kept row and the next bucket's average.
+    y = df[y_col].to_numpy(dtype=np.float64)
+    buckets = np.array_split(np.arange(1, n - 1), n_out - 2)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i, bucket in enumerate(buckets):
+        nxt = buckets[i + 1] if i + 1 < len(buckets) else np.array([n - 1])
+        avg_x, avg_y = nxt.mean(), y[nxt].mean()
+        area = np.abs((a - avg_x) * (y[bucket] - y[a]) - (a - bucket) * (avg_y - y[a]))
+        a = bucket[np.argmax(area)]
+        idx[i + 1] = a
+    return df.iloc[idx]
+
+async def get_market_chart(client: httpx.AsyncClient, coin_id: str, days: int) -> pd.DataFrame:
     params = {"vs_currency": "usd", "days": days}
-    r = requests.get(f"{GECKO_BASE}/coins/{coin_id}/market_chart", params=params, timeout=20)
-    js = r.json()
+    r = await client.get(f"{GECKO_BASE}/coins/{coin_id}/market_chart", params=params)
+    js = orjson.loads(r.content)
     prices = js.get("prices", [])
     market_caps = js.get("market_caps", [])
-    df_p = pd.DataFrame(prices, columns=["ts", "price"]) if prices else pd.DataFrame(columns=["ts", "price"])
-    df_m = pd.DataFrame(market_caps, columns=["ts", "market_cap"]) if market_caps else pd.DataFrame(columns=["ts", "market_cap"])
-    df = pd.merge(df_p, df_m, on="ts", how="left")
+    ts = [p[0] for p in prices]
+    if prices and len(prices) == len(market_caps) and ts == [m[0] for m in market_caps]:
+        # Common case: both arrays share the same timestamps, so no join is needed
+        df = pd.DataFrame({"ts": ts, "price": [p[1] for p in prices], "market_cap": [m[1] for m in market_caps]})
+    else:
+        df_p = pd.DataFrame(prices, columns=["ts", "price"]) if prices else pd.DataFrame(columns=["ts", "price"])
+        df_m = pd.DataFrame(market_caps, columns=["ts", "market_cap"]) if market_caps else pd.DataFrame(columns=["ts", "market_cap"])
+        # Both arrays are time-sorted, so an ordered merge avoids a hash join
+        df = pd.merge_ordered(df_p, df_m, on="ts", how="left", fill_method=None)
     if not df.empty:
         df["Date"] = pd.to_datetime(df["ts"], unit="ms")
     return df
 
-@st.cache_data(ttl=300)
-def get_global_data() -> dict:
-    r = requests.get(f"{GECKO_BASE}/global", timeout=20)
-    js = r.json().get("data", {})
+async def get_global_data(client: httpx.AsyncClient) -> dict:
+    r = await client.get(f"{GECKO_BASE}/global")
+    js = orjson.loads(r.content).get("data", {})
     btc_dom = js.get("market_cap_percentage", {}).get("btc")
     return {"btc_dom": btc_dom}
 
-@st.cache_data(ttl=300)
-def get_fear_greed() -> dict:
+async def get_fear_greed(client: httpx.AsyncClient) -> dict:
     # Alternative.me F&G index
     try:
-        r = requests.get("https://api.alternative.me/fng/", params={"limit": 1}, timeout=20)
-        data = r.json().get("data", [])
+        r = await client.get("https://api.alternative.me/fng/", params={"limit": 1})
+        data = orjson.loads(r.content).get("data", [])
         if data:
             val = float(data[0].get("value", "nan"))
             cls = data[0].get("value_classification", "")
@@ -76,11 +127,10 @@ def get_fear_greed() -> dict:
         pass
     return {"value": np.nan, "classification": ""}
 
-@st.cache_data(ttl=300)
-def get_market_tickers(coin_id: str) -> pd.DataFrame:
+async def get_market_tickers(client: httpx.AsyncClient, coin_id: str) -> pd.DataFrame:
     # Exchange tickers for selected coin
-    r = requests.get(f"{GECKO_BASE}/coins/{coin_id}/tickers", timeout=20)
-    js = r.json()
+    r = await client.get(f"{GECKO_BASE}/coins/{coin_id}/tickers")
+    js = orjson.loads(r.content)
     tickers = js.get("tickers", [])
     rows = []
     for t in tickers:
@@ -99,6 +149,72 @@ def get_market_tickers(coin_id: str) -> pd.DataFrame:
         df["Volume %"] = (df["Volume_24h"] / total_vol * 100.0).round(2) if total_vol else 0.0
     return df
 
+async def _gather(jobs: list) -> list:
+    # One keep-alive pool per batch; an AsyncClient is bound to the event loop it was used on,
+    # and asyncio.run() creates a fresh loop on every call
+    limits = httpx.Limits(max_keepalive_connections=8)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=20) as client:
+        return await asyncio.gather(*(job(client) for job in jobs))
+
+@st.cache_resource
+def _endpoint_cache() -> dict:
+    """App-wide {key: (expires_at, value)} store for the async endpoints."""
+    return {}
+
+def load_all(active_id: str, days: int, ttl: float = 300) -> tuple:
+    """Fetch chart, global, fear & greed and tickers data, gathering only the endpoints
+    whose cached result is missing or expired. Each endpoint is cached on its own key,
+    so a time-range change only refetches the market chart.
+    Returns (series, global_data, fear_greed, market_tickers).
+    """
+    jobs = {
+        ("market_chart", active_id, days): lambda client: get_market_chart(client, active_id, days),
+        ("global",): get_global_data,
+        ("fear_greed",): get_fear_greed,
+        ("tickers", active_id): lambda client: get_market_tickers(client, active_id),
+    }
+    cache = _endpoint_cache()
+    now = time.monotonic()
+    stale = [key for key in jobs if key not in cache or cache[key][0] <= now]
+    if stale:
+        results = asyncio.run(_gather([jobs[key] for key in stale]))
+        for key, value in zip(stale, results):
+            cache[key] = (now + ttl, value)
+    # Copies so page code can't mutate the shared cached values (as st.cache_data guarantees)
+    return tuple(copy.deepcopy(cache[key][1]) for key in jobs)
+
+# Cached figure builders: reruns with the same inputs get a fresh copy instead of rebuilding the figure
+@st.cache_data(max_entries=32)
+def build_line(series: pd.DataFrame, y_col: str, title: str, color: str) -> go.Figure:
+    fig = px.line(series, x="Date", y=y_col, title=title)
+    fig.update_traces(line=dict(color=color, width=2))
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+@st.cache_data(max_entries=32)
+def build_gauge(value: float, classification: str) -> go.Figure:
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=value if pd.notna(value) else 0,
+        title={'text': f"Fear & Greed\n{classification}"},
+        gauge={'axis': {'range': [0, 100]}, 'bar': {'color': 'orange'}}
+    ))
+    fig.update_layout(height=220, margin=dict(l=10, r=10, t=30, b=0))
+    return fig
+
+@st.cache_data(max_entries=32)
+def build_sparklines(spark_long: pd.DataFrame, colors: dict, coin_order: list[str]) -> go.Figure:
+    # One faceted figure instead of a separate Plotly chart per card
+    fig = px.line(
+        spark_long, x="x", y="y", color="coin", facet_col="coin", facet_col_wrap=len(coin_order),
+        category_orders={"coin": coin_order}, color_discrete_map=colors, height=150,
+    )
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(matches=None, visible=False)
+    fig.update_layout(showlegend=False, margin=dict(l=10, r=10, t=20, b=0))
+    return fig
+
 # -----------------------------
 # State
 # -----------------------------
@@ -111,30 +227,41 @@ if "active_crypto_id" not in st.session_state:
 # -----------------------------
 st.title("Crypto Prices")
 ids = [m["id"] for m in MAJORS]
-card_df = get_markets_for_cards(ids)
 
 st.subheader("Top Coins")
+show_sparklines = st.toggle("Show 7-day sparklines", value=True, key="show_sparklines")
+# One /coins/markets request either way; the sparkline response also carries the card fields
+card_df = get_markets_sparkline(ids) if show_sparklines else get_markets_basic(ids)
+
+# Card values and colors resolved up front so the card loop only draws widgets
+card_df["color"] = np.where(card_df["price_change_percentage_24h"] >= 0, "green", "red")
+lookup = card_df.set_index("id")[["current_price", "price_change_percentage_24h", "color"]].to_dict("index")
+
 cols = st.columns(len(MAJORS))
 for i, m in enumerate(MAJORS):
-    coin = card_df.loc[card_df["id"] == m["id"]]
+    row = lookup.get(m["id"])
     with cols[i]:
         st.button(f"{m['name']} ({m['symbol']})", key=f"btn_{m['id']}",
                   on_click=lambda cid=m['id'], cname=m['name']: (st.session_state.__setitem__('active_crypto_id', cid), st.session_state.__setitem__('active_crypto_name', cname)))
-        if not coin.empty:
-            price = coin["current_price"].values[0]
-            pct = coin["price_change_percentage_24h"].values[0]
-            color = "green" if (pd.notna(pct) and pct >= 0) else "red"
-            st.markdown(f"**${price:,.2f}**  |  <span style='color:{color}'>{pct:.2f}%</span>", unsafe_allow_html=True)
-            spark = coin["sparkline"].values[0]
-            if isinstance(spark, list) and len(spark) > 3:
-                s_df = pd.DataFrame({"x": range(len(spark)), "y": spark})
-                s_fig = px.line(s_df, x="x", y="y")
-                s_fig.update_layout(showlegend=False, height=120, margin=dict(l=10, r=10, t=10, b=0))
-                s_fig.update_traces(line=dict(color=color))
-                st.plotly_chart(s_fig, use_container_width=True)
+        if row:
+            st.markdown(f"**${row['current_price']:,.2f}**  |  <span style='color:{row['color']}'>{row['price_change_percentage_24h']:.2f}%</span>", unsafe_allow_html=True)
         else:
             st.write("–")
 
+if show_sparklines:
+    spark_long = (
+        card_df.loc[card_df["sparkline"].str.len() > 3, ["symbol", "sparkline"]]
+        .explode("sparkline")
+        .rename(columns={"sparkline": "y"})
+    )
+    if not spark_long.empty:
+        spark_long["coin"] = spark_long["symbol"].str.upper()
+        spark_long["x"] = spark_long.groupby("coin").cumcount()
+        spark_long["y"] = spark_long["y"].astype(float)
+        spark_colors = dict(zip(card_df["symbol"].str.upper(), card_df["color"]))
+        s_fig = build_sparklines(spark_long, spark_colors, [m["symbol"] for m in MAJORS])
+        st.plotly_chart(s_fig, use_container_width=True)
+
 active_id = st.session_state.active_crypto_id
 active_name = st.session_state.active_crypto_name
 
@@ -144,7 +271,7 @@ active_name = st.session_state.active_crypto_name
 st.subheader(f"{active_name} Price / Market Cap")
 trange = st.radio("Time Range", ["1D", "7D", "1M", "3M", "1Y"], index=1, horizontal=True)
 DAYS_MAP = {"1D": 1, "7D": 7, "1M": 30, "3M": 90, "1Y": 365}
-series = get_market_chart(active_id, DAYS_MAP[trange])
+series, global_data, fg, mt = load_all(active_id, DAYS_MAP[trange])
 
 metric_choice = st.radio("Metric", ["Price", "Market Cap"], index=0, horizontal=True)
 if not series.empty:
@@ -152,19 +279,15 @@ if not series.empty:
     color = "green" if up >= 0 else "red"
     y_col = "price" if metric_choice == "Price" else "market_cap"
     title = f"{active_name} {metric_choice} Chart"
-    # Ensure clean data types and drop missing values
-    series = series.copy()
-    if "Date" in series.columns:
-        series["Date"] = pd.to_datetime(series["Date"], errors="coerce")
-    series[y_col] = pd.to_numeric(series.get(y_col), errors="coerce")
+    # Date is already datetime64 from get_market_chart; only coerce the metric if needed
+    if not np.issubdtype(series[y_col].dtype, np.number):
+        series[y_col] = pd.to_numeric(series[y_col], errors="coerce")
     series = series.dropna(subset=["Date", y_col])
+    series = downsample_lttb(series, y_col)
     if series.empty:
         st.info("No chart data available after cleaning.")
     else:
-        fig = px.line(series, x="Date", y=y_col, title=title)
-        fig.update_traces(line=dict(color=color, width=2))
-        fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_line(series, y_col, title, color), use_container_width=True)
 else:
     st.info("No chart data available.")
 
@@ -172,21 +295,12 @@ else:
 # Optional sentiment widgets
 # -----------------------------
 st.subheader("Market Sentiment")
-fg = get_fear_greed()
-global_data = get_global_data()
 
 c1, c2, c3 = st.columns(3)
 with c1:
     val = fg.get("value")
     cls = fg.get("classification")
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=val if pd.notna(val) else 0,
-        title={'text': f"Fear & Greed\n{cls}"},
-        gauge={'axis': {'range': [0, 100]}, 'bar': {'color': 'orange'}}
-    ))
-    fig.update_layout(height=220, margin=dict(l=10, r=10, t=30, b=0))
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_gauge(val, cls), use_container_width=True)
 with c2:
     btc_dom = global_data.get("btc_dom")
     st.metric("Bitcoin Dominance", f"{btc_dom:.2f}%" if btc_dom else "–")
@@ -202,18 +316,9 @@ with c3:
 # Bottom – markets table
 # -----------------------------
 st.subheader(f"{active_name} Markets")
-mt = get_market_tickers(active_id)
 if not mt.empty:
-    # Pretty liquidity
-    def map_liq(x):
-        if x == "green":
-            return 3
-        if x == "yellow":
-            return 2
-        if x == "red":
-            return 1
-        return np.nan
-    mt["Liquidity score"] = mt["Liquidity"].apply(map_liq)
+    # Pretty liquidity; unknown trust scores become NaN
+    mt["Liquidity score"] = mt["Liquidity"].map({"green": 3, "yellow": 2, "red": 1})
     display_cols = ["Exchange", "Pair", "Price", "Volume_24h", "Liquidity score", "Volume %"]
     st.dataframe(mt[display_cols].rename(columns={"Volume_24h": "Volume (24h)"}).style.format({
         "Price": "${:,.4f}", "Volume (24h)": "{:,.0f}", "Volume %": "{:.2f}%"
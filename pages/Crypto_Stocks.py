@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import requests
+import requests_cache
+import orjson
 import os
 from datetime import datetime, timedelta
 
@@ -32,9 +33,62 @@ start_date = end_date - timedelta(days=DAYS_MAP[days_back])
 
 BASE_URL = "https://www.alphavantage.co/query"
 
+# Alpha Vantage field names → OHLCV columns
+AV_STOCK_COLUMNS = {
+    "1. open": "Open",
+    "2. high": "High",
+    "3. low": "Low",
+    "4. close": "Close",
+    "5. volume": "Volume",
+}
+# Crypto uses the USD-denominated fields; Open is left as NaN
+AV_CRYPTO_COLUMNS = {
+    "2a. high (USD)": "High",
+    "3a. low (USD)": "Low",
+    "4a. close (USD)": "Close",
+    "5. volume": "Volume",
+}
+
 # -----------------------------
 # Fetch functions (cached)
 # -----------------------------
+def _is_time_series(response) -> bool:
+    """Alpha Vantage reports rate limits and bad keys as HTTP 200 with a Note/Information body;
+    only responses holding a "Time Series ..." payload are worth persisting.
+    """
+    try:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return False
+    return isinstance(data, dict) and any(k.startswith("Time Series") for k in data)
+
+
+@st.cache_resource
+def get_http_session() -> requests_cache.CachedSession:
+    """Keep-alive session whose responses persist on disk across restarts.
+    The API key is left out of cache keys and stored responses.
+    """
+    return requests_cache.CachedSession(
+        ".cache/http",
+        backend="sqlite",
+        expire_after=600,
+        allowable_codes=(200,),
+        ignored_parameters=["apikey"],
+        filter_fn=_is_time_series,
+    )
+
+SESSION = get_http_session()
+
+
+def _av_series_to_frame(ts: dict, columns: dict) -> pd.DataFrame:
+    """Build a Date-sorted OHLCV frame from an Alpha Vantage {date: {field: value}} payload."""
+    df = pd.DataFrame.from_dict(ts, orient="index")
+    df = df.rename(columns=columns).reindex(columns=["Open", "High", "Low", "Close", "Volume"])
+    df = df.astype(np.float64)
+    df.index = pd.to_datetime(df.index, format="%Y-%m-%d")
+    return df.rename_axis("Date").reset_index().sort_values("Date")
+
+
 @st.cache_data(ttl=600)
 def av_fetch_daily_series(symbol: str, api_key: str) -> pd.DataFrame:
     """Fetch daily series for stock or crypto (auto-detect via '-USD')."""
@@ -47,19 +101,10 @@ def av_fetch_daily_series(symbol: str, api_key: str) -> pd.DataFrame:
                 "market": market,
                 "apikey": api_key,
             }
-            r = requests.get(BASE_URL, params=params, timeout=20)
-            data = r.json()
+            r = SESSION.get(BASE_URL, params=params, timeout=20)
+            data = orjson.loads(r.content)
             ts = data.get("Time Series (Digital Currency Daily)", {})
-            rows = []
-            for date_str, vals in ts.items():
-                # Use USD close
-                close = float(vals.get("4a. close (USD)", "nan"))
-                high = float(vals.get("2a. high (USD)", "nan"))
-                low = float(vals.get("3a. low (USD)", "nan"))
-                volume = float(vals.get("5. volume", "nan"))
-                rows.append({"Date": pd.to_datetime(date_str), "Open": np.nan, "High": high, "Low": low, "Close": close, "Volume": volume})
-            df = pd.DataFrame(rows).sort_values("Date")
-            return df
+            return _av_series_to_frame(ts, AV_CRYPTO_COLUMNS)
         else:
             params = {
                 "function": "TIME_SERIES_DAILY",
@@ -67,21 +112,10 @@ def av_fetch_daily_series(symbol: str, api_key: str) -> pd.DataFrame:
                 "outputsize": "compact",
                 "apikey": api_key,
             }
-            r = requests.get(BASE_URL, params=params, timeout=20)
-            data = r.json()
+            r = SESSION.get(BASE_URL, params=params, timeout=20)
+            data = orjson.loads(r.content)
             ts = data.get("Time Series (Daily)", {})
-            rows = []
-            for date_str, vals in ts.items():
-                rows.append({
-                    "Date": pd.to_datetime(date_str),
-                    "Open": float(vals.get("1. open", "nan")),
-                    "High": float(vals.get("2. high", "nan")),
-                    "Low": float(vals.get("3. low", "nan")),
-                    "Close": float(vals.get("4. close", "nan")),
-                    "Volume": float(vals.get("5. volume", "nan")),
-                })
-            df = pd.DataFrame(rows).sort_values("Date")
-            return df
+            return _av_series_to_frame(ts, AV_STOCK_COLUMNS)
     except Exception:
         return pd.DataFrame(columns=["Date", "Open", "High", "Low", "Close", "Volume"])  # empty
 
@@ -89,8 +123,9 @@ def av_fetch_daily_series(symbol: str, api_key: str) -> pd.DataFrame:
 def compute_snapshot_from_series(df: pd.DataFrame) -> dict:
     if df.empty:
         return {"Current Price": np.nan, "% Change": np.nan}
-    last = df.iloc[-1]["Close"]
-    prev = df.iloc[-2]["Close"] if len(df) > 1 else np.nan
+    closes = df["Close"].to_numpy(dtype=np.float64)
+    last = closes[-1]
+    prev = closes[-2] if closes.size > 1 else np.nan
     pct = ((last - prev) / prev * 100.0) if not np.isnan(prev) else np.nan
     return {"Current Price": float(last), "% Change": float(pct) if not np.isnan(pct) else np.nan}
 
@@ -107,34 +142,29 @@ for t in assets:
 
 snap_df = pd.DataFrame(rows)
 if not snap_df.empty:
-    def color_change(val):
-        try:
-            if np.isnan(val):
-                return ""
-            return "color: green;" if val >= 0 else "color: red;"
-        except Exception:
-            return ""
+    def color_change(col: pd.Series) -> np.ndarray:
+        vals = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+        return np.where(np.isnan(vals), "", np.where(vals >= 0, "color: green;", "color: red;"))
     st.subheader("Current Prices")
-    st.dataframe(snap_df.style.format({"Current Price": "{:.2f}", "% Change": "{:.2f}%"}).applymap(color_change, subset=["% Change"]), use_container_width=True)
+    st.dataframe(snap_df.style.format({"Current Price": "{:.2f}", "% Change": "{:.2f}%"}).apply(color_change, subset=["% Change"]), use_container_width=True)
 else:
     st.info("Select assets to view current prices.")
 
 # -----------------------------
 # Trend line chart
 # -----------------------------
-series_list = []
-for t, df in series_by_asset.items():
-    if not df.empty:
-        # filter by date range
-        mask = (df["Date"] >= start_date) & (df["Date"] <= end_date)
-        tmp = df.loc[mask, ["Date", "Close"]].copy()
-        tmp["Asset"] = t
-        series_list.append(tmp)
-
-if series_list:
+# filter by date range
+parts = {
+    t: df.loc[(df["Date"] >= start_date) & (df["Date"] <= end_date), ["Date", "Close"]]
+    for t, df in series_by_asset.items() if not df.empty
+}
+
+if parts:
     st.subheader("Trend (Closing Price)")
-    chart_df = pd.concat(series_list, ignore_index=True)
-    fig = px.line(chart_df, x="Date", y="Close", color="Asset")
+    # Long form in one concat; the dict keys become the Asset column
+    chart_df = pd.concat(parts, names=["Asset", "_idx"]).reset_index(level="Asset")
+    chart_df["Asset"] = pd.Categorical(chart_df["Asset"], categories=list(parts))
+    fig = px.line(chart_df, x="Date", y="Close", color="Asset", category_orders={"Asset": list(parts)})
     st.plotly_chart(fig, use_container_width=True)
 else:
     st.info("No data available for the selected range.")
@@ -18,17 +18,14 @@ METAL_ASSETS = ["Gold", "Silver", "Platinum"]
 # Using Yahoo Finance tickers; some livestock categories are proxied:
 # - Sheep → no direct symbol on Yahoo; using Feeder Cattle (GF=F) as proxy
 # - Poultry → no direct symbol on Yahoo; using Lean Hogs (HE=F) as proxy
-TICKER_MAP = {
-    "Livestock": {
-        "Cattle": "LE=F",      # Live Cattle Futures
-        "Sheep": "GF=F",       # Feeder Cattle Futures (proxy)
-        "Poultry": "HE=F",     # Lean Hogs Futures (proxy)
-    },
-    "Metal": {
-        "Gold": "GC=F",         # Gold Futures
-        "Silver": "SI=F",       # Silver Futures
-        "Platinum": "PL=F",     # Platinum Futures
-    }
+# (asset type, asset) -> (ticker, display label)
+ASSET_CONFIG = {
+    ("Livestock", "Cattle"): ("LE=F", "Livestock · Cattle"),            # Live Cattle Futures
+    ("Livestock", "Sheep"): ("GF=F", "Livestock · Sheep (proxy)"),      # Feeder Cattle Futures (proxy)
+    ("Livestock", "Poultry"): ("HE=F", "Livestock · Poultry (proxy)"),  # Lean Hogs Futures (proxy)
+    ("Metal", "Gold"): ("GC=F", "Metal · Gold"),                        # Gold Futures
+    ("Metal", "Silver"): ("SI=F", "Metal · Silver"),                    # Silver Futures
+    ("Metal", "Platinum"): ("PL=F", "Metal · Platinum"),                # Platinum Futures
 }
 
 TIME_RANGES = {
@@ -43,24 +40,37 @@ TIME_RANGES = {
 # -----------------------------
 # Helpers
 # -----------------------------
+def _normalize_history(df: pd.DataFrame) -> pd.DataFrame:
+    """Shape a yfinance history frame into Date + OHLCV columns."""
+    # Flatten MultiIndex columns (e.g., ('Close', 'LE=F')) to single level
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [c[0] for c in df.columns]
+    df = df.dropna(how="all").rename(columns=str.title)  # Open, High, Low, Close, Adj Close, Volume
+    df.index.name = "Date"
+    df = df.reset_index()
+    # Ensure required columns exist
+    for col in ["Open", "High", "Low", "Close", "Volume"]:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df
+
+
 @st.cache_data(ttl=600)
-def fetch_history(ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
-    """Fetch historical OHLCV data for a ticker between start and end."""
+def fetch_history_1y(tickers: tuple[str, ...]) -> dict[str, pd.DataFrame]:
+    """Fetch one year of history for several tickers in one batched request.
+    Time ranges are sliced from this locally so the cache key stays stable across reruns.
+    Returns {ticker: df}; tickers that fail to download map to an empty frame.
+    """
+    empty = pd.DataFrame(columns=["Date", "Open", "High", "Low", "Close", "Volume"])
     try:
-        df = yf.download(ticker, start=start, end=end, progress=False)
-        # Flatten MultiIndex columns (e.g., ('Close', 'LE=F')) to single level
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = [c[0] for c in df.columns]
-        df = df.rename(columns=str.title)  # Open, High, Low, Close, Adj Close, Volume
-        df.index.name = "Date"
-        df = df.reset_index()
-        # Ensure required columns exist
-        for col in ["Open", "High", "Low", "Close", "Volume"]:
-            if col not in df.columns:
-                df[col] = np.nan
-        return df
+        hist = yf.Tickers(" ".join(tickers)).history(period="1y", group_by="ticker", threads=True, progress=False)
     except Exception:
-        return pd.DataFrame(columns=["Date", "Open", "High", "Low", "Close", "Volume"])  # empty
+        return {t: empty for t in tickers}
+    if len(tickers) == 1 and not isinstance(hist.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker
+        return {tickers[0]: _normalize_history(hist)}
+    fetched = set(hist.columns.get_level_values(0))
+    return {t: _normalize_history(hist[t].copy()) if t in fetched else empty for t in tickers}
 
 
 def compute_kpis(df: pd.DataFrame) -> dict:
@@ -71,14 +81,40 @@ def compute_kpis(df: pd.DataFrame) -> dict:
             "Highest Closing Price": np.nan,
             "Lowest Closing Price": np.nan,
         }
+    # One reduction pass: rows are (min, max), columns are (High, Low, Close)
+    agg = df[["High", "Low", "Close"]].agg(["min", "max"]).to_numpy(dtype=np.float64)
     return {
-        "Highest Value": float(df["High"].max(skipna=True)),
-        "Lowest Value": float(df["Low"].min(skipna=True)),
-        "Highest Closing Price": float(df["Close"].max(skipna=True)),
-        "Lowest Closing Price": float(df["Close"].min(skipna=True)),
+        "Highest Value": float(agg[1, 0]),
+        "Lowest Value": float(agg[0, 1]),
+        "Highest Closing Price": float(agg[1, 2]),
+        "Lowest Closing Price": float(agg[0, 2]),
     }
 
 
+# Figure builders are cached on their inputs so unchanged charts skip Plotly construction on reruns.
+# st.cache_data returns a fresh copy on every hit, so st.plotly_chart cannot mutate the cached figure.
+@st.cache_data(max_entries=32)
+def build_line(plot_df: pd.DataFrame, asset_order: list[str]) -> go.Figure:
+    fig = px.line(plot_df, x="Date", y="Close", color="Asset", title="Closing Price Trend",
+                  category_orders={"Asset": asset_order})
+    fig.update_layout(legend_title_text="Asset")
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def build_candlestick(df: pd.DataFrame, title: str) -> go.Figure:
+    fig = go.Figure(data=[go.Candlestick(
+        x=df["Date"],
+        open=df["Open"],
+        high=df["High"],
+        low=df["Low"],
+        close=df["Close"],
+        name=title
+    )])
+    fig.update_layout(title=title, xaxis_title="Date", yaxis_title="Price")
+    return fig
+
+
 def line_chart_close(series_map: dict):
     """Plot closing price over time for multiple assets.
     series_map: {asset_label: df}
@@ -86,36 +122,21 @@ def line_chart_close(series_map: dict):
     if not series_map:
         st.info("Select at least one asset to view the closing price trend.")
         return
-    plot_df_list = []
-    for label, df in series_map.items():
-        if df.empty:
-            continue
-        tmp = df[["Date", "Close"]].copy()
-        tmp["Asset"] = label
-        plot_df_list.append(tmp)
-    if not plot_df_list:
+    parts = {label: df[["Date", "Close"]] for label, df in series_map.items() if not df.empty}
+    if not parts:
         st.warning("No data available for the selected assets.")
         return
-    plot_df = pd.concat(plot_df_list, ignore_index=True)
-    fig = px.line(plot_df, x="Date", y="Close", color="Asset", title="Closing Price Trend")
-    fig.update_layout(legend_title_text="Asset")
-    st.plotly_chart(fig, use_container_width=True)
+    # Long form in one concat; the dict keys become the Asset column
+    plot_df = pd.concat(parts, names=["Asset", "_idx"]).reset_index(level="Asset")
+    plot_df["Asset"] = pd.Categorical(plot_df["Asset"], categories=list(parts))
+    st.plotly_chart(build_line(plot_df, list(parts)), use_container_width=True)
 
 
 def candlestick_chart(df: pd.DataFrame, title: str):
     if df.empty:
         st.warning("No data available for the selected asset.")
         return
-    fig = go.Figure(data=[go.Candlestick(
-        x=df["Date"],
-        open=df["Open"],
-        high=df["High"],
-        low=df["Low"],
-        close=df["Close"],
-        name=title
-    )])
-    fig.update_layout(title=title, xaxis_title="Date", yaxis_title="Price")
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_candlestick(df[["Date", "Open", "High", "Low", "Close"]], title), use_container_width=True)
 
 
 # -----------------------------
@@ -159,16 +180,18 @@ time_label = st.radio("Time Range", list(TIME_RANGES.keys()), index=5, horizonta
 end_date = datetime.now()
 start_date = end_date - timedelta(days=TIME_RANGES[time_label])
 
+# One batched download for all selected tickers
+ticker_list = tuple(ASSET_CONFIG[(asset_type, asset)][0] for asset in selected_assets)
+batch = fetch_history_1y(ticker_list) if ticker_list else {}
+
 asset_data = {}
 for asset in selected_assets:
-    ticker = TICKER_MAP[asset_type].get(asset)
-    label = f"{asset_type} · {asset}"
-    if asset_type == "Livestock" and asset in ("Sheep", "Poultry"):
-        label += " (proxy)"
-    df = fetch_history(ticker, start=start_date, end=end_date) if ticker else pd.DataFrame()
-    # Volatility column (High - Low)
+    ticker, label = ASSET_CONFIG[(asset_type, asset)]
+    df = batch.get(ticker, pd.DataFrame())
     if not df.empty:
-        df["Volatility"] = df["High"] - df["Low"]
+        df = df[df["Date"] >= start_date]
+        # Volatility column (High - Low)
+        df = df.assign(Volatility=df["High"] - df["Low"])
     asset_data[asset] = {"label": label, "df": df}
 
 # -----------------------------